@@ -1,14 +1,22 @@
-from fastapi import FastAPI, HTTPException
+import asyncio
+import time
+
+from fastapi import FastAPI, Header, HTTPException, Query, Request
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel, Field
-from typing import Dict, List, Optional, Any
+from typing import Optional
 
+from app.models.schemas import TextRequest, JobRequest, AnalysisResponse
+from app.models.results import AnalysisResult
+from app.responses import ORJSONResponse, negotiate_response
 from app.services.nlp_service import NLPService
+from app.services.job_queue import JobQueue, TransientJobError, PRIORITIES
 
 app = FastAPI(
     title="NLP Microservice API",
     description="NLP service for text analysis including sentiment, NER, classification, and bias detection",
-    version="0.1.0"
+    version="0.1.0",
+    default_response_class=ORJSONResponse
 )
 
 # Configure CORS
@@ -23,38 +31,36 @@ app.add_middleware(
 # Initialize NLP service
 nlp_service = NLPService()
 
-class TextRequest(BaseModel):
-    text: Optional[str] = None
-    content: Optional[str] = None  # Added for news aggregator format
-    title: Optional[str] = None
-    source: Optional[str] = None
-    siteName: Optional[str] = None  # Added for news aggregator format
-    url: Optional[str] = None
-    date: Optional[str] = None  # Added for news aggregator format
-    author: Optional[str] = None  # Added for news aggregator format
-    language: Optional[str] = "en"
-
-class CredibilityResult(BaseModel):
-    score: float
-    factors: Dict[str, Any]
-
-class AnalysisResponse(BaseModel):
-    sentiment: Dict[str, float]
-    entities: List[Dict[str, Any]]
-    classification: Dict[str, float]
-    geographic_info: Optional[Dict[str, Any]]
-    summary: Optional[str]
-    bias_analysis: Optional[Dict[str, Any]]
-    topWords: Optional[Dict[str, int]] = None
-    topPhrases: Optional[Dict[str, int]] = None
-    credibility: Optional[CredibilityResult] = None
+def analyze_job(payload: dict, attempt: int) -> dict:
+    """Analyze one queued article, asking for a retry if any stage failed."""
+    # The first attempt already counted the article towards the trends
+    result, errors = nlp_service.analyze_with_errors(**payload, update_trends=attempt == 1)
+    if errors:
+        raise TransientJobError(
+            "; ".join(f"{stage}: {error}" for stage, error in errors.items()), result=result
+        )
+    return result
+
+# Background queue for long-running analyses
+job_queue = JobQueue(handler=analyze_job)
+
+@app.on_event("startup")
+async def start_job_queue():
+    job_queue.start()
+
+@app.on_event("shutdown")
+async def shutdown_services():
+    job_queue.stop()
+    nlp_service.close()
 
 @app.get("/")
 async def root():
     return {"message": "NLP Microservice is running. Access /docs for API documentation."}
 
+# response_model only documents the schema; results are returned pre-built and skip re-validation
 @app.post("/analyze", response_model=AnalysisResponse)
-async def analyze_text(request: TextRequest):
+def analyze_text(request: TextRequest, http_request: Request,
+                       x_latency_budget_ms: Optional[float] = Header(None, gt=0)):
     try:
         # Use content field if text is not provided
         text_content = request.text if request.text else request.content
@@ -68,14 +74,15 @@ async def analyze_text(request: TextRequest):
             title=request.title,
             source=source_name,
             url=request.url,
-            language=request.language
+            language=request.language,
+            budget_ms=request.budget_ms or x_latency_budget_ms
         )
-        return result
+        return negotiate_response(http_request, AnalysisResult(**result))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error analyzing text: {str(e)}")
 
 @app.post("/sentiment")
-async def analyze_sentiment(request: TextRequest):
+def analyze_sentiment(request: TextRequest):
     try:
         text_content = request.text if request.text else request.content
         if not text_content:
@@ -87,7 +94,7 @@ async def analyze_sentiment(request: TextRequest):
         raise HTTPException(status_code=500, detail=f"Error analyzing sentiment: {str(e)}")
 
 @app.post("/entities")
-async def extract_entities(request: TextRequest):
+def extract_entities(request: TextRequest):
     try:
         text_content = request.text if request.text else request.content
         if not text_content:
@@ -99,7 +106,7 @@ async def extract_entities(request: TextRequest):
         raise HTTPException(status_code=500, detail=f"Error extracting entities: {str(e)}")
 
 @app.post("/classify")
-async def classify_text(request: TextRequest):
+def classify_text(request: TextRequest):
     try:
         text_content = request.text if request.text else request.content
         if not text_content:
@@ -111,7 +118,7 @@ async def classify_text(request: TextRequest):
         raise HTTPException(status_code=500, detail=f"Error classifying text: {str(e)}")
 
 @app.post("/geographic")
-async def extract_geographic_info(request: TextRequest):
+def extract_geographic_info(request: TextRequest):
     try:
         text_content = request.text if request.text else request.content
         if not text_content:
@@ -123,7 +130,7 @@ async def extract_geographic_info(request: TextRequest):
         raise HTTPException(status_code=500, detail=f"Error extracting geographic info: {str(e)}")
 
 @app.post("/summarize")
-async def summarize_text(request: TextRequest):
+def summarize_text(request: TextRequest):
     try:
         text_content = request.text if request.text else request.content
         if not text_content:
@@ -135,7 +142,7 @@ async def summarize_text(request: TextRequest):
         raise HTTPException(status_code=500, detail=f"Error summarizing text: {str(e)}")
 
 @app.post("/bias")
-async def analyze_bias(request: TextRequest):
+def analyze_bias(request: TextRequest):
     try:
         text_content = request.text if request.text else request.content
         source_name = request.source if request.source else request.siteName
@@ -143,11 +150,58 @@ async def analyze_bias(request: TextRequest):
         if not text_content:
             raise HTTPException(status_code=422, detail="Either 'text' or 'content' field is required")
             
-        bias = nlp_service.analyze_bias(text_content, source_name)
+        bias = nlp_service.analyze_bias(text_content, source_name, request.url)
         return {"bias_analysis": bias}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error analyzing bias: {str(e)}")
 
+@app.post("/jobs", status_code=202)
+def submit_job(request: JobRequest):
+    if request.priority not in PRIORITIES:
+        raise HTTPException(status_code=422, detail=f"'priority' must be one of: {', '.join(PRIORITIES)}")
+    if not request.articles:
+        raise HTTPException(status_code=422, detail="At least one article is required")
+
+    payloads = []
+    for i, article in enumerate(request.articles):
+        text_content = article.text if article.text else article.content
+        if not text_content:
+            raise HTTPException(status_code=422, detail=f"Article {i}: either 'text' or 'content' field is required")
+        payloads.append({
+            "text": text_content,
+            "title": article.title,
+            "source": article.source if article.source else article.siteName,
+            "url": article.url,
+            "language": article.language
+        })
+
+    try:
+        job_id = job_queue.submit(payloads, priority=PRIORITIES[request.priority])
+        return {"job_id": job_id, "status": "queued", "total": len(payloads)}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error submitting job: {str(e)}")
+
+@app.get("/jobs/{job_id}")
+async def get_job(http_request: Request, job_id: str, wait: float = Query(0, ge=0, le=60, description="Seconds to long-poll for completion")):
+    deadline = time.monotonic() + wait
+    while True:
+        # SQLite reads block, so keep them off the event loop; only the wait is async
+        job = await run_in_threadpool(job_queue.get, job_id)
+        if job is None:
+            raise HTTPException(status_code=404, detail=f"Job '{job_id}' not found")
+        if job["status"] in ("done", "failed") or time.monotonic() >= deadline:
+            return negotiate_response(http_request, job)
+        await asyncio.sleep(min(job_queue.poll_interval, max(deadline - time.monotonic(), 0)))
+
+@app.get("/trends")
+async def get_trends(window: str = Query("1h", description="Trend window: 1h, 6h or 24h"),
+                     top_n: int = Query(15, ge=1, le=100)):
+    try:
+        trends = nlp_service.trends.get_trends(window, top_n)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    return {"window": window, **trends}
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run("app.main:app", host="0.0.0.0", port=8000, reload=True) 
\ No newline at end of file
@@ -0,0 +1,26 @@
+# Typed analysis results
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Any
+
+
+@dataclass(slots=True)
+class AnalysisResult:
+    """
+    Complete text analysis result as produced by NLPService.
+
+    The service builds these values itself, so they are encoded directly
+    instead of being re-validated against AnalysisResponse. Stage results
+    stay the plain containers the service returns; the encoders handle them
+    natively, so converting each one into a typed object would only add cost.
+    """
+    sentiment: Optional[Dict[str, Any]]
+    entities: Optional[List[Dict[str, Any]]]
+    classification: Optional[Dict[str, Any]]
+    geographic_info: Optional[Dict[str, Any]] = None
+    summary: Optional[str] = None
+    bias_analysis: Optional[Dict[str, Any]] = None
+    topWords: Optional[Dict[str, int]] = None
+    topPhrases: Optional[Dict[str, int]] = None
+    credibility: Optional[Dict[str, Any]] = None
+    language: Optional[Dict[str, Any]] = None
+    degraded: Optional[Dict[str, str]] = None
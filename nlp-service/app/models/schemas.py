@@ -13,6 +13,13 @@ class TextRequest(BaseModel):
     date: Optional[str] = Field(None, description="Publication date")
     author: Optional[str] = Field(None, description="Author of the content")
     language: Optional[str] = Field("en", description="Language code (ISO 639-1)")
+    budget_ms: Optional[float] = Field(None, gt=0, description="Latency budget in milliseconds (or X-Latency-Budget-Ms header)")
+
+
+class JobRequest(BaseModel):
+    """Request schema for queued analysis of one or more articles."""
+    articles: List[TextRequest] = Field(..., description="Articles to analyze")
+    priority: str = Field("default", description="Queue priority: live, default or backfill")
 
 
 class Entity(BaseModel):
@@ -55,14 +62,23 @@ class CredibilityResult(BaseModel):
     factors: Dict[str, float] = Field(..., description="Individual credibility factors")
 
 
+class LanguageInfo(BaseModel):
+    """Language identification results."""
+    code: str = Field(..., description="Language code (ISO 639-1) used to route the analysis")
+    detected: bool = Field(..., description="Whether the language was identified from the text rather than the request")
+    confidence: float = Field(..., description="Identification confidence (0-1)")
+
+
 class AnalysisResponse(BaseModel):
     """Complete text analysis response."""
-    sentiment: Union[SentimentResult, Dict[str, str]] = Field(..., description="Sentiment analysis results")
-    entities: List[Union[Entity, Dict[str, str]]] = Field(..., description="Named entities found in text")
-    classification: Dict[str, float] = Field(..., description="Topic classification scores")
+    sentiment: Optional[Union[SentimentResult, Dict[str, str]]] = Field(..., description="Sentiment analysis results")
+    entities: Optional[List[Union[Entity, Dict[str, str]]]] = Field(..., description="Named entities found in text")
+    classification: Optional[Dict[str, float]] = Field(..., description="Topic classification scores")
     geographic_info: Optional[Union[GeoInfo, Dict[str, str]]] = Field(None, description="Geographic information")
     summary: Optional[str] = Field(None, description="Text summary")
     bias_analysis: Optional[Union[BiasAnalysis, Dict[str, str]]] = Field(None, description="Bias analysis results")
     topWords: Optional[Dict[str, int]] = Field(None, description="Most frequent relevant words")
     topPhrases: Optional[Dict[str, int]] = Field(None, description="Most significant phrases")
-    credibility: Optional[Union[CredibilityResult, Dict[str, Any]]] = Field(None, description="Credibility assessment") 
\ No newline at end of file
+    credibility: Optional[Union[CredibilityResult, Dict[str, Any]]] = Field(None, description="Credibility assessment")
+    language: Optional[LanguageInfo] = Field(None, description="Language the text was analyzed as")
+    degraded: Optional[Dict[str, str]] = Field(None, description="Stages degraded or skipped for the latency budget or language") 
\ No newline at end of file
@@ -0,0 +1,85 @@
+from dataclasses import fields, is_dataclass
+from typing import Any, Dict
+
+import numpy as np
+import orjson
+from fastapi import Request
+from fastapi.responses import Response
+
+try:
+    import msgpack
+except ImportError:  # MessagePack support is optional
+    msgpack = None
+
+MSGPACK_MEDIA_TYPES = ("application/msgpack", "application/x-msgpack")
+
+
+def _msgpack_default(obj: Any) -> Any:
+    """Convert values msgpack cannot encode natively, keeping numbers numeric."""
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    return str(obj)
+
+
+def _accept_qualities(accept: str) -> Dict[str, float]:
+    """Parse an Accept header into media ranges and their q-values."""
+    qualities = {}
+    for part in accept.split(","):
+        media_type, *params = [item.strip() for item in part.split(";")]
+        if not media_type:
+            continue
+        quality = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        qualities[media_type.lower()] = quality
+    return qualities
+
+
+class ORJSONResponse(Response):
+    """JSON response encoded with orjson, bypassing FastAPI's jsonable_encoder."""
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, default=str, option=orjson.OPT_SERIALIZE_NUMPY)
+
+
+class MsgPackResponse(Response):
+    """Compact binary response for internal callers that send Accept: application/msgpack."""
+    media_type = "application/msgpack"
+
+    def render(self, content: Any) -> bytes:
+        # msgpack has no dataclass support; result fields are plain containers
+        if is_dataclass(content):
+            content = {field.name: getattr(content, field.name) for field in fields(content)}
+        return msgpack.packb(content, default=_msgpack_default, use_bin_type=True)
+
+
+def negotiate_response(request: Request, content: Any, status_code: int = 200) -> Response:
+    """
+    Encode content without response_model validation, picking the format from the Accept header.
+
+    Args:
+        request: Incoming request
+        content: Dict, list or dataclass to encode
+        status_code: HTTP status code
+
+    Returns:
+        MessagePack response if the client prefers it over JSON and msgpack is installed, JSON otherwise
+    """
+    qualities = _accept_qualities(request.headers.get("accept", ""))
+    msgpack_quality = max(qualities.get(media_type, 0.0) for media_type in MSGPACK_MEDIA_TYPES)
+    # JSON is the default, so it wins ties and also matches wildcards
+    json_quality = next(
+        (qualities[media_type] for media_type in ("application/json", "application/*", "*/*") if media_type in qualities),
+        0.0
+    )
+    if msgpack is not None and msgpack_quality > 0 and msgpack_quality > json_quality:
+        return MsgPackResponse(content, status_code=status_code)
+    return ORJSONResponse(content, status_code=status_code)
@@ -0,0 +1,89 @@
+import os
+import time
+import threading
+from typing import Dict, Optional
+
+# Initial cost guesses (seconds per unit) used until real timings are recorded.
+# Model stages are measured per 1000 characters, geocoding per location lookup.
+DEFAULT_STAGE_COSTS = {
+    "classification": 1.5,
+    "summary": 2.0,
+    "geocoding": 0.8
+}
+
+
+class StageTimings:
+    def __init__(self, priors: Optional[Dict[str, float]] = None, alpha: float = 0.2):
+        """
+        Track recent per-unit durations of pipeline stages.
+
+        Args:
+            priors: Initial seconds-per-unit estimate for each stage
+            alpha: Weight of the newest sample in the moving average
+        """
+        self.alpha = alpha
+        self._costs = dict(priors if priors is not None else DEFAULT_STAGE_COSTS)
+        self._lock = threading.Lock()
+
+    def record(self, stage: str, seconds: float, units: float):
+        """Fold one measured run of a stage into its moving average."""
+        if units <= 0:
+            return
+        cost = seconds / units
+        with self._lock:
+            previous = self._costs.get(stage)
+            self._costs[stage] = cost if previous is None else previous + self.alpha * (cost - previous)
+
+    def estimate(self, stage: str, units: float) -> float:
+        """Return the expected duration in seconds of running a stage on units of work."""
+        with self._lock:
+            return self._costs.get(stage, 0.0) * units
+
+
+class LoadTracker:
+    def __init__(self):
+        """Count analyses in flight to scale stage estimates under load."""
+        self.cpus = os.cpu_count() or 1
+        self._in_flight = 0
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        with self._lock:
+            self._in_flight += 1
+        return self
+
+    def __exit__(self, *exc):
+        with self._lock:
+            self._in_flight -= 1
+
+    def factor(self) -> float:
+        """
+        Return how much slower than an idle box stages are expected to run.
+
+        Uses the larger of concurrent analyses and the 1-minute load average,
+        both relative to the CPU count, and never less than 1.
+        """
+        load = self._in_flight / self.cpus
+        if hasattr(os, "getloadavg"):
+            load = max(load, os.getloadavg()[0] / self.cpus)
+        return max(1.0, load)
+
+
+class Deadline:
+    def __init__(self, budget_ms: float):
+        """
+        Initialize a latency budget starting now.
+
+        Args:
+            budget_ms: Total time allowed in milliseconds
+        """
+        self.budget_ms = budget_ms
+        self.expires_at = time.monotonic() + budget_ms / 1000.0
+
+    def remaining(self) -> float:
+        """Return the seconds left before the deadline (negative once passed)."""
+        return self.expires_at - time.monotonic()
+
+    def fits(self, estimate: float) -> bool:
+        """Return whether work expected to take estimate seconds finishes in time."""
+        return estimate <= self.remaining()
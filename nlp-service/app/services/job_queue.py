@@ -0,0 +1,341 @@
+import os
+import json
+import time
+import uuid
+import socket
+import sqlite3
+import threading
+import logging
+from typing import Dict, List, Optional, Any, Callable
+
+logger = logging.getLogger(__name__)
+
+# Priority levels for queued items (higher runs first)
+PRIORITY_LIVE = 10
+PRIORITY_DEFAULT = 5
+PRIORITY_BACKFILL = 0
+
+PRIORITIES = {
+    "live": PRIORITY_LIVE,
+    "default": PRIORITY_DEFAULT,
+    "backfill": PRIORITY_BACKFILL
+}
+
+# Exceptions a retry cannot fix (bad payloads, programming errors)
+PERMANENT_ERRORS = (ValueError, TypeError, KeyError, AttributeError, NotImplementedError)
+
+
+class TransientJobError(Exception):
+    """Raised by a handler for a task worth retrying, optionally with the partial result it produced."""
+
+    def __init__(self, message: str, result: Optional[Dict[str, Any]] = None):
+        super().__init__(message)
+        self.result = result
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    priority INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    total INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS tasks (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    job_id TEXT NOT NULL REFERENCES jobs(id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    priority INTEGER NOT NULL,
+    status TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    payload TEXT NOT NULL,
+    result TEXT,
+    error TEXT,
+    available_at REAL NOT NULL,
+    finished_at REAL,
+    owner TEXT,
+    lease_expires REAL
+);
+CREATE INDEX IF NOT EXISTS idx_tasks_queue ON tasks(status, priority DESC, available_at, id);
+CREATE INDEX IF NOT EXISTS idx_tasks_job ON tasks(job_id, position);
+"""
+
+
+class JobQueue:
+    def __init__(self, handler: Callable[[Dict[str, Any], int], Dict[str, Any]],
+                 db_path: Optional[str] = None, workers: Optional[int] = None,
+                 max_retries: Optional[int] = None, result_ttl: Optional[float] = None,
+                 lease_seconds: Optional[float] = None):
+        """
+        Initialize a SQLite-backed job queue.
+
+        Args:
+            handler: Callable that processes one task payload and returns its result,
+                given the payload and the attempt number (1 for the first attempt)
+            db_path: Path of the SQLite database file (env JOB_DB_PATH)
+            workers: Number of concurrent worker threads (env JOB_WORKERS)
+            max_retries: Retries allowed for a failing task (env JOB_MAX_RETRIES)
+            result_ttl: Seconds finished jobs are kept before cleanup (env JOB_RESULT_TTL)
+            lease_seconds: How long a claimed task stays reserved without a heartbeat
+                before another process may take it over (env JOB_LEASE_SECONDS)
+        """
+        self.handler = handler
+        self.db_path = db_path or os.getenv("JOB_DB_PATH", "jobs.sqlite3")
+        self.workers = workers or int(os.getenv("JOB_WORKERS", "2"))
+        self.max_retries = max_retries if max_retries is not None else int(os.getenv("JOB_MAX_RETRIES", "2"))
+        self.result_ttl = result_ttl if result_ttl is not None else float(os.getenv("JOB_RESULT_TTL", "3600"))
+        self.lease_seconds = lease_seconds or float(os.getenv("JOB_LEASE_SECONDS", "120"))
+        self.retry_backoff = 2.0
+        self.poll_interval = 0.5
+        self.cleanup_interval = 60.0
+
+        self._local = threading.local()
+        self._claim_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+        self._threads: List[threading.Thread] = []
+        self._last_cleanup = 0.0
+
+        # Identifies this process's claims; tasks whose lease expires (e.g. because
+        # the owning process died) are taken over by any process sharing the database
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+        conn = self._connect()
+        conn.executescript(_SCHEMA)
+        columns = {row["name"] for row in conn.execute("PRAGMA table_info(tasks)")}
+        for column, column_type in (("owner", "TEXT"), ("lease_expires", "REAL")):
+            if column not in columns:
+                conn.execute(f"ALTER TABLE tasks ADD COLUMN {column} {column_type}")
+
+    def _connect(self) -> sqlite3.Connection:
+        """Return the SQLite connection owned by the calling thread."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA foreign_keys=ON")
+            self._local.conn = conn
+        return conn
+
+    def start(self):
+        """Start the worker threads."""
+        if self._threads:
+            return
+        self._stop.clear()
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._worker_loop, name=f"job-worker-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        thread = threading.Thread(target=self._heartbeat_loop, name="job-heartbeat", daemon=True)
+        thread.start()
+        self._threads.append(thread)
+        logger.info(f"Job queue started with {self.workers} workers ({self.db_path})")
+
+    def stop(self, timeout: float = 10.0):
+        """Signal the worker threads to stop and wait for them to finish."""
+        self._stop.set()
+        self._wakeup.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    def submit(self, payloads: List[Dict[str, Any]], priority: int = PRIORITY_DEFAULT) -> str:
+        """
+        Enqueue one or more payloads as a single job.
+
+        Args:
+            payloads: Task payloads, one per article
+            priority: Scheduling priority (higher runs first)
+
+        Returns:
+            The job id
+        """
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute(
+                "INSERT INTO jobs (id, priority, created_at, total) VALUES (?, ?, ?, ?)",
+                (job_id, priority, now, len(payloads))
+            )
+            conn.executemany(
+                "INSERT INTO tasks (job_id, position, priority, status, payload, available_at) "
+                "VALUES (?, ?, ?, 'queued', ?, ?)",
+                [(job_id, i, priority, json.dumps(payload), now) for i, payload in enumerate(payloads)]
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        self._wakeup.set()
+        return job_id
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Get the status and results of a job.
+
+        Args:
+            job_id: Id returned by submit
+
+        Returns:
+            Dictionary with job status and per-item results, or None if unknown
+        """
+        conn = self._connect()
+        job = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if job is None:
+            return None
+
+        tasks = conn.execute(
+            "SELECT status, attempts, result, error FROM tasks WHERE job_id = ? ORDER BY position",
+            (job_id,)
+        ).fetchall()
+
+        counts = {"queued": 0, "running": 0, "done": 0, "failed": 0}
+        items = []
+        for task in tasks:
+            counts[task["status"]] += 1
+            items.append({
+                "status": task["status"],
+                "attempts": task["attempts"],
+                "result": json.loads(task["result"]) if task["result"] else None,
+                "error": task["error"]
+            })
+
+        finished = counts["done"] + counts["failed"]
+        if finished == job["total"]:
+            status = "failed" if counts["done"] == 0 and counts["failed"] else "done"
+        elif counts["running"] or finished:
+            status = "running"
+        else:
+            status = "queued"
+
+        return {
+            "job_id": job_id,
+            "status": status,
+            "priority": job["priority"],
+            "created_at": job["created_at"],
+            "total": job["total"],
+            "completed": finished,
+            "items": items
+        }
+
+    def _claim(self) -> Optional[sqlite3.Row]:
+        """Atomically take the next runnable task (or one whose lease expired), highest priority first."""
+        conn = self._connect()
+        now = time.time()
+        with self._claim_lock:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                task = conn.execute(
+                    "SELECT id, payload, attempts FROM tasks "
+                    "WHERE (status = 'queued' AND available_at <= ?) "
+                    "OR (status = 'running' AND lease_expires < ?) "
+                    "ORDER BY priority DESC, available_at, id LIMIT 1",
+                    (now, now)
+                ).fetchone()
+                if task is not None:
+                    conn.execute(
+                        "UPDATE tasks SET status = 'running', attempts = attempts + 1, "
+                        "owner = ?, lease_expires = ? WHERE id = ?",
+                        (self.owner, now + self.lease_seconds, task["id"])
+                    )
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        return task
+
+    def _finish(self, task_id: int, result: Dict[str, Any], error: Optional[str] = None):
+        """Store the result of a task, with the error of its last attempt if the result is partial."""
+        self._connect().execute(
+            "UPDATE tasks SET status = 'done', result = ?, error = ?, finished_at = ?, owner = NULL "
+            "WHERE id = ? AND owner = ?",
+            (json.dumps(result, default=str), error, time.time(), task_id, self.owner)
+        )
+
+    def _fail(self, task_id: int, attempts: int, error: str, retry: bool = True,
+              result: Optional[Dict[str, Any]] = None):
+        """
+        Requeue a failed task with backoff, or finish it once retries run out.
+
+        A task that still produced a partial result is stored as done with
+        that result and the error; otherwise it is marked failed.
+        """
+        now = time.time()
+        conn = self._connect()
+        if retry and attempts <= self.max_retries:
+            delay = self.retry_backoff ** attempts
+            conn.execute(
+                "UPDATE tasks SET status = 'queued', error = ?, available_at = ?, owner = NULL "
+                "WHERE id = ? AND owner = ?",
+                (error, now + delay, task_id, self.owner)
+            )
+            logger.warning(f"Task {task_id} failed (attempt {attempts}), retrying in {delay:.0f}s: {error}")
+        elif result is not None:
+            self._finish(task_id, result, error)
+            logger.warning(f"Task {task_id} finished with errors after {attempts} attempts: {error}")
+        else:
+            conn.execute(
+                "UPDATE tasks SET status = 'failed', error = ?, finished_at = ?, owner = NULL "
+                "WHERE id = ? AND owner = ?",
+                (error, now, task_id, self.owner)
+            )
+            logger.error(f"Task {task_id} failed after {attempts} attempts: {error}")
+
+    def cleanup(self) -> int:
+        """
+        Delete jobs whose items all finished more than result_ttl seconds ago.
+
+        Returns:
+            Number of jobs removed
+        """
+        cutoff = time.time() - self.result_ttl
+        cursor = self._connect().execute(
+            "DELETE FROM jobs WHERE id IN ("
+            "SELECT job_id FROM tasks GROUP BY job_id "
+            "HAVING SUM(status IN ('queued', 'running')) = 0 AND MAX(finished_at) < ?)",
+            (cutoff,)
+        )
+        if cursor.rowcount:
+            logger.info(f"Removed {cursor.rowcount} expired jobs")
+        return cursor.rowcount
+
+    def _heartbeat_loop(self):
+        """Extend the leases of tasks this process is running until stopped."""
+        while not self._stop.wait(self.lease_seconds / 3):
+            try:
+                self._connect().execute(
+                    "UPDATE tasks SET lease_expires = ? WHERE status = 'running' AND owner = ?",
+                    (time.time() + self.lease_seconds, self.owner)
+                )
+            except Exception as e:
+                logger.error(f"Error renewing job leases: {e}")
+
+    def _worker_loop(self):
+        """Claim and process tasks until stopped."""
+        while not self._stop.is_set():
+            try:
+                now = time.time()
+                if now - self._last_cleanup > self.cleanup_interval:
+                    self._last_cleanup = now
+                    self.cleanup()
+
+                task = self._claim()
+                if task is None:
+                    self._wakeup.wait(self.poll_interval)
+                    self._wakeup.clear()
+                    continue
+
+                try:
+                    result = self.handler(json.loads(task["payload"]), task["attempts"] + 1)
+                    self._finish(task["id"], result)
+                except TransientJobError as e:
+                    self._fail(task["id"], task["attempts"] + 1, str(e), result=e.result)
+                except PERMANENT_ERRORS as e:
+                    self._fail(task["id"], task["attempts"] + 1, f"{type(e).__name__}: {e}", retry=False)
+                except Exception as e:
+                    self._fail(task["id"], task["attempts"] + 1, str(e))
+            except Exception as e:
+                logger.error(f"Error in job worker: {e}")
+                self._stop.wait(self.poll_interval)
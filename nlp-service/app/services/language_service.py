@@ -0,0 +1,226 @@
+import os
+import re
+import math
+import threading
+import logging
+from collections import Counter, OrderedDict
+from typing import Dict, Iterable, Optional, Tuple, Callable, Any
+
+logger = logging.getLogger(__name__)
+
+# Result fields produced by the analysis pipeline
+ALL_STAGES = (
+    "sentiment", "entities", "bias_analysis", "topWords", "topPhrases",
+    "credibility", "classification", "summary", "geographic_info"
+)
+
+# Stages each language can run. English gets the full pipeline; the VADER,
+# BART and bias/credibility heuristics are English-only, so other languages
+# get an extractive summary plus what their spaCy pipeline supports
+# (entities and geographic info need an NER component).
+LANGUAGE_PROFILES = {
+    "en": {"model": "en_core_web_md", "stages": set(ALL_STAGES)},
+    "de": {"model": "de_core_news_sm", "stages": {"entities", "geographic_info", "topWords"}},
+    "fr": {"model": "fr_core_news_sm", "stages": {"entities", "geographic_info", "topWords"}},
+    "es": {"model": "es_core_news_sm", "stages": {"entities", "geographic_info", "topWords"}},
+    "pt": {"model": "pt_core_news_sm", "stages": {"entities", "geographic_info", "topWords"}},
+    "it": {"model": "it_core_news_sm", "stages": {"entities", "geographic_info", "topWords"}},
+    "nl": {"model": "nl_core_news_sm", "stages": {"entities", "geographic_info", "topWords"}},
+    "ru": {"model": "ru_core_news_sm", "stages": {"entities", "geographic_info", "topWords"}},
+}
+DEFAULT_PROFILE = {"model": None, "stages": {"topWords"}}
+
+# Languages told apart by character n-grams, with the NLTK stopword list used as their profile
+NGRAM_LANGUAGES = {
+    "en": "english", "fr": "french", "de": "german", "es": "spanish", "pt": "portuguese",
+    "it": "italian", "nl": "dutch", "id": "indonesian", "tr": "turkish", "sv": "swedish",
+    "da": "danish", "no": "norwegian", "fi": "finnish", "ro": "romanian", "hu": "hungarian"
+}
+
+# Unicode blocks of scripts used by a single language (or a dominant one)
+SCRIPT_LANGUAGES = [
+    (0x0900, 0x097F, "hi"),  # Devanagari
+    (0x0980, 0x09FF, "bn"),  # Bengali
+    (0x0A00, 0x0A7F, "pa"),  # Gurmukhi
+    (0x0A80, 0x0AFF, "gu"),  # Gujarati
+    (0x0B80, 0x0BFF, "ta"),  # Tamil
+    (0x0C00, 0x0C7F, "te"),  # Telugu
+    (0x0C80, 0x0CFF, "kn"),  # Kannada
+    (0x0D00, 0x0D7F, "ml"),  # Malayalam
+    (0x0D80, 0x0DFF, "si"),  # Sinhala
+    (0x0E00, 0x0E7F, "th"),  # Thai
+    (0x0370, 0x03FF, "el"),  # Greek
+    (0x0400, 0x04FF, "ru"),  # Cyrillic
+    (0x0590, 0x05FF, "he"),  # Hebrew
+    (0xAC00, 0xD7AF, "ko"),  # Hangul
+    (0x3040, 0x30FF, "ja"),  # Hiragana and Katakana
+    (0x4E00, 0x9FFF, "zh"),  # CJK ideographs
+]
+
+# Letters that separate the languages written in Arabic script
+URDU_LETTERS = set("ٹڈڑںےۓھہ")
+PERSIAN_LETTERS = set("پچژگکی")
+ARABIC_LETTERS = set("ةىيك")
+
+
+def _is_arabic_script(cp: int) -> bool:
+    return 0x0600 <= cp <= 0x06FF or 0x0750 <= cp <= 0x077F or 0xFB50 <= cp <= 0xFDFF or 0xFE70 <= cp <= 0xFEFF
+
+
+def _trigrams(words: Iterable[str]) -> Counter:
+    """Count character trigrams of words padded with word boundaries."""
+    counts = Counter()
+    for word in words:
+        padded = f" {word} "
+        for i in range(len(padded) - 2):
+            counts[padded[i:i + 3]] += 1
+    return counts
+
+
+class LanguageIdentifier:
+    def __init__(self, word_lists: Dict[str, Iterable[str]], min_letters: int = 20,
+                 min_latin_letters: int = 100, min_confidence: float = 0.5, smoothing: float = 0.5):
+        """
+        Initialize a character n-gram language identifier.
+
+        Non-Latin scripts are identified from their Unicode block. Latin-script
+        text is compared against trigram profiles built from each language's
+        common words.
+
+        Args:
+            word_lists: Common (stop) words per ISO 639-1 language code
+            min_letters: Minimum number of letters needed to make a guess
+            min_latin_letters: Minimum number of letters needed to tell Latin-script languages apart
+            min_confidence: Latin-script guesses below this confidence are reported as undetermined
+            smoothing: Additive smoothing for trigrams missing from a profile
+        """
+        self.min_letters = min_letters
+        self.min_latin_letters = min_latin_letters
+        self.min_confidence = min_confidence
+        self.words = {code: {w.lower() for w in words} for code, words in word_lists.items()}
+        self.profiles = {}
+        profiles = {code: _trigrams(words) for code, words in self.words.items()}
+        vocabulary = len(set().union(*profiles.values())) if profiles else 0
+        for code, profile in profiles.items():
+            total = sum(profile.values())
+            if not total:
+                continue
+            # Log-probabilities of seen trigrams, plus the shared log-probability of an unseen one
+            denominator = total + smoothing * vocabulary
+            log_probs = {gram: math.log((count + smoothing) / denominator) for gram, count in profile.items()}
+            self.profiles[code] = (log_probs, math.log(smoothing / denominator))
+
+    def _detect_script(self, text: str) -> Tuple[Optional[str], int, int]:
+        """Return the dominant non-Latin language (if any), its letter count and the total letter count."""
+        counts = Counter()
+        arabic = Counter()
+        letters = 0
+        for char in text:
+            if not char.isalpha():
+                continue
+            letters += 1
+            cp = ord(char)
+            if cp < 0x0250:
+                counts["latin"] += 1
+            elif _is_arabic_script(cp):
+                counts["arabic"] += 1
+                if char in URDU_LETTERS:
+                    arabic["ur"] += 1
+                elif char in PERSIAN_LETTERS:
+                    arabic["fa"] += 1
+                elif char in ARABIC_LETTERS:
+                    arabic["ar"] += 1
+            else:
+                for start, end, code in SCRIPT_LANGUAGES:
+                    if start <= cp <= end:
+                        counts[code] += 1
+                        break
+        if not counts:
+            return None, 0, letters
+
+        script, count = counts.most_common(1)[0]
+        if script == "arabic":
+            if arabic["ur"]:
+                return "ur", count, letters
+            return ("fa" if arabic["fa"] > arabic["ar"] else "ar"), count, letters
+        if script == "zh" and counts["ja"]:
+            return "ja", count + counts["ja"], letters
+        return (None if script == "latin" else script), count, letters
+
+    def detect(self, text: str) -> Tuple[Optional[str], float]:
+        """
+        Identify the language of a text.
+
+        Args:
+            text: Text to identify
+
+        Returns:
+            Tuple of the ISO 639-1 code (None if undetermined or below
+            min_confidence) and a confidence between 0 and 1
+        """
+        # A few kilobytes are plenty to identify the language of an article
+        sample = text[:5000]
+        language, count, letters = self._detect_script(sample)
+        if letters < self.min_letters:
+            return None, 0.0
+        if language is not None:
+            return language, count / letters
+        if letters < self.min_latin_letters:
+            return None, 0.0
+
+        words = re.findall(r"[^\W\d_]+", sample.lower())
+        grams = _trigrams(words)
+        if not grams or not self.profiles:
+            return None, 0.0
+
+        # Naive Bayes over character trigrams
+        scores = []
+        for code, (log_probs, unseen) in self.profiles.items():
+            score = sum(count * log_probs.get(gram, unseen) for gram, count in grams.items())
+            scores.append((score, code))
+        scores.sort(reverse=True)
+        best, code = scores[0]
+        margin = best - scores[1][0] if len(scores) > 1 else math.inf
+
+        # Confident when the best language clearly beats the runner-up and the
+        # text reads like running prose in it. Prose is roughly 40% common words;
+        # headlines and lists of names are mostly proper nouns, whose trigrams
+        # say little about the language around them.
+        common = sum(word in self.words[code] for word in words) / len(words)
+        confidence = (1.0 - math.exp(-margin)) * min(1.0, common / 0.4)
+        if confidence < self.min_confidence:
+            return None, confidence
+        return code, confidence
+
+
+class PipelineCache:
+    def __init__(self, loader: Callable[[str], Any], max_resident: Optional[int] = None,
+                 pinned: Optional[Dict[str, Any]] = None):
+        """
+        Keep a bounded number of per-language pipelines in memory.
+
+        Args:
+            loader: Function that builds the pipeline for a language code
+            max_resident: Maximum number of unpinned pipelines kept loaded (env MAX_MODEL_LOAD)
+            pinned: Pipelines that are always resident and never evicted
+        """
+        self.loader = loader
+        self.max_resident = max_resident or int(os.getenv("MAX_MODEL_LOAD", "2"))
+        self.pinned = dict(pinned or {})
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, language: str) -> Any:
+        """Return the pipeline for a language, loading it and evicting the least recently used if needed."""
+        if language in self.pinned:
+            return self.pinned[language]
+        with self._lock:
+            if language in self._cache:
+                self._cache.move_to_end(language)
+                return self._cache[language]
+            pipeline = self.loader(language)
+            self._cache[language] = pipeline
+            while len(self._cache) > self.max_resident:
+                evicted, _ = self._cache.popitem(last=False)
+                logger.info(f"Evicted '{evicted}' language pipeline")
+            return pipeline
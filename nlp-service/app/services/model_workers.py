@@ -0,0 +1,438 @@
+import os
+import time
+import queue
+import logging
+import threading
+import multiprocessing as mp
+from multiprocessing import shared_memory
+from typing import Dict, List, Optional, Any
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Capacity of each worker's shared input buffer: rows of token ids by max tokens per row
+MAX_ROWS = 16
+MAX_TOKENS = 1024
+
+# The buffer holds input_ids followed by attention_mask, both int64
+_ARRAYS = ("input_ids", "attention_mask")
+
+
+class ModelUnavailableError(RuntimeError):
+    """Raised when a pool cannot serve requests because its model fails to load."""
+
+
+def parse_cpus(spec: Optional[str]) -> Optional[List[int]]:
+    """
+    Parse a CPU list such as "0-3,6" into CPU ids.
+
+    Returns:
+        Sorted CPU ids, or None if spec is empty
+    """
+    if not spec:
+        return None
+    cpus = set()
+    for part in spec.split(","):
+        part = part.strip()
+        if "-" in part:
+            start, end = part.split("-")
+            cpus.update(range(int(start), int(end) + 1))
+        elif part:
+            cpus.add(int(part))
+    return sorted(cpus)
+
+
+def _shared_arrays(buf, rows: int, cols: int) -> Dict[str, np.ndarray]:
+    """Return views of the input arrays laid out in a shared buffer."""
+    size = rows * cols
+    return {
+        name: np.ndarray((rows, cols), dtype=np.int64, buffer=buf, offset=i * size * 8)
+        for i, name in enumerate(_ARRAYS)
+    }
+
+
+def _load_model(kind: str, model_name: str):
+    """Load a model inside a worker process."""
+    from transformers import AutoModelForSequenceClassification, AutoModelForSeq2SeqLM
+
+    if kind == "classification":
+        model = AutoModelForSequenceClassification.from_pretrained(model_name)
+    elif kind == "summary":
+        model = AutoModelForSeq2SeqLM.from_pretrained(model_name)
+    else:
+        raise ValueError(f"Unknown model kind '{kind}'")
+    model.eval()
+    return model
+
+
+def _run(kind: str, model, arrays: Dict[str, np.ndarray], params: Dict[str, Any]) -> Any:
+    """Run one request inside a worker process."""
+    import torch
+
+    # The tensors share memory with the buffer the API process wrote into
+    input_ids = torch.from_numpy(arrays["input_ids"])
+    attention_mask = torch.from_numpy(arrays["attention_mask"])
+    with torch.no_grad():
+        if kind == "classification":
+            return model(input_ids=input_ids, attention_mask=attention_mask).logits.tolist()
+        return model.generate(input_ids=input_ids, attention_mask=attention_mask, **params)[0].tolist()
+
+
+def _worker_main(kind: str, model_name: str, shm_name: str, conn, cpus: Optional[List[int]]):
+    """Entry point of a model worker process: load the model, then serve requests from conn."""
+    if cpus and hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, cpus)
+        try:
+            import torch
+            torch.set_num_threads(len(cpus))
+        except ImportError:
+            pass
+
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        model = _load_model(kind, model_name)
+    except Exception as e:
+        conn.send(("error", f"Could not load {model_name}: {e}"))
+        shm.close()
+        return
+    conn.send(("ready", None))
+
+    while True:
+        try:
+            message = conn.recv()
+        except EOFError:
+            break
+        if message is None:
+            break
+
+        rows, cols, params = message
+        try:
+            result = _run(kind, model, _shared_arrays(shm.buf, rows, cols), params)
+            conn.send(("ok", result))
+        except Exception as e:
+            conn.send(("error", str(e)))
+
+    shm.close()
+
+
+class _Worker:
+    def __init__(self, pool: "ModelWorkerPool", index: int):
+        self.pool = pool
+        self.name = f"{pool.kind}-worker-{index}"
+        self.shm = shared_memory.SharedMemory(create=True, size=pool.max_rows * pool.max_tokens * 8 * len(_ARRAYS))
+        self.process = None
+        self.conn = None
+        # "starting" until the model is loaded, then "idle" or "busy"; "failed" if loading failed
+        self.state = "starting"
+        # Bumped on every (re)start so stale entries in the idle queue can be told apart
+        self.generation = 0
+        self.failures = 0
+        self.started_at = 0.0
+
+    def start(self):
+        self.state = "starting"
+        self.generation += 1
+        self.started_at = time.monotonic()
+        parent_conn, child_conn = self.pool._ctx.Pipe()
+        self.process = self.pool._ctx.Process(
+            target=_worker_main,
+            args=(self.pool.kind, self.pool.model_name, self.shm.name, child_conn, self.pool.cpus),
+            name=self.name,
+            daemon=True
+        )
+        self.process.start()
+        child_conn.close()
+        self.conn = parent_conn
+
+    def stop(self, timeout: float = 5.0):
+        if self.process is None:
+            return
+        try:
+            self.conn.send(None)
+        except Exception:
+            pass
+        self.process.join(timeout)
+        if self.process.is_alive():
+            self.process.kill()
+            self.process.join()
+        self.conn.close()
+        self.process = None
+
+    def restart(self):
+        logger.warning(f"Restarting {self.name}")
+        self.failures += 1
+        if self.process is not None and self.process.is_alive():
+            self.process.kill()
+        if self.process is not None:
+            self.process.join()
+            self.conn.close()
+            self.process = None
+        self.start()
+
+    def is_alive(self) -> bool:
+        return self.process is not None and self.process.is_alive()
+
+
+class ModelWorkerPool:
+    def __init__(self, kind: str, model_name: str, workers: int = 1, cpus: Optional[List[int]] = None,
+                 timeout: float = 300.0, max_rows: int = MAX_ROWS, max_tokens: int = MAX_TOKENS,
+                 check_interval: float = 1.0):
+        """
+        Initialize a pool of processes serving one model.
+
+        Inputs are written to a shared memory buffer owned by each worker, so
+        only their shape and generation parameters go through the pipe.
+
+        Args:
+            kind: "classification" or "summary"
+            model_name: Hugging Face model to load in each worker
+            workers: Number of worker processes, which is also the pool's concurrency limit
+            cpus: CPU ids the workers are pinned to (Linux only)
+            timeout: Seconds to wait for a free worker and for a result (includes model loading)
+            max_rows: Maximum sequences per request
+            max_tokens: Maximum tokens per sequence
+            check_interval: Seconds between supervisor checks of the workers
+        """
+        self.kind = kind
+        self.model_name = model_name
+        self.cpus = cpus
+        if cpus and hasattr(os, "sched_getaffinity"):
+            self.cpus = [cpu for cpu in cpus if cpu in os.sched_getaffinity(0)] or None
+        self.timeout = timeout
+        self.max_rows = max_rows
+        self.max_tokens = max_tokens
+
+        self.check_interval = check_interval
+
+        self._ctx = mp.get_context("spawn")
+        self._workers = [_Worker(self, i) for i in range(max(1, workers))]
+        # Entries are (worker, generation); only workers that reported ready are queued
+        self._idle = queue.Queue()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._supervisor = None
+        # Set when a worker fails to load the model, cleared when one loads it
+        self._load_failed = False
+
+    def start(self):
+        """Start the worker processes and the supervisor that admits and restarts them."""
+        for worker in self._workers:
+            worker.start()
+        self._stop.clear()
+        self._supervisor = threading.Thread(target=self._supervise, name=f"{self.kind}-supervisor", daemon=True)
+        self._supervisor.start()
+        logger.info(f"Started {len(self._workers)} {self.kind} workers for {self.model_name} (cpus: {self.cpus or 'all'})")
+
+    def stop(self):
+        """Stop the supervisor and worker processes and release their shared memory."""
+        self._stop.set()
+        if self._supervisor is not None:
+            self._supervisor.join()
+            self._supervisor = None
+        for worker in self._workers:
+            worker.stop()
+            worker.shm.close()
+            worker.shm.unlink()
+
+    @property
+    def available(self) -> bool:
+        """Whether requests can be served: some worker has the model loaded, or no load has failed yet."""
+        return not self._load_failed or any(worker.state in ("idle", "busy") for worker in self._workers)
+
+    def _supervise(self):
+        """Admit workers once their model is loaded and restart dead ones in the background."""
+        while not self._stop.wait(self.check_interval):
+            for worker in self._workers:
+                try:
+                    with self._lock:
+                        self._check(worker)
+                except Exception as e:
+                    logger.error(f"Error supervising {worker.name}: {e!r}")
+
+    def _check(self, worker: _Worker):
+        """Advance one worker's state; called with the pool lock held."""
+        if worker.state == "busy":
+            # The calling thread notices a failure itself
+            return
+        if worker.state == "starting":
+            failure = None
+            if worker.conn.poll():
+                try:
+                    status, message = worker.conn.recv()
+                except (EOFError, OSError):
+                    status, message = "error", "exited while loading"
+                if status == "ready":
+                    worker.state = "idle"
+                    worker.failures = 0
+                    self._load_failed = False
+                    self._idle.put((worker, worker.generation))
+                    logger.info(f"{worker.name} is ready")
+                    return
+                failure = message
+            elif not worker.is_alive():
+                failure = "exited while loading"
+            if failure is None:
+                return
+            logger.error(f"{worker.name} failed to start: {failure}")
+            worker.state = "failed"
+            self._load_failed = True
+        if not worker.is_alive():
+            # Back off when a worker keeps dying, e.g. because its model cannot be loaded
+            delay = min(2 ** worker.failures, 60)
+            if time.monotonic() - worker.started_at >= delay:
+                worker.restart()
+
+    def _acquire(self) -> _Worker:
+        """
+        Take the next ready worker, skipping queue entries left over from before a restart.
+
+        Fails at once instead of waiting out the timeout while the model cannot be loaded.
+        """
+        deadline = time.monotonic() + self.timeout
+        while True:
+            if not self.available:
+                raise ModelUnavailableError(f"{self.model_name} could not be loaded by any {self.kind} worker")
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise TimeoutError(f"No {self.kind} worker became free within {self.timeout}s")
+            try:
+                # Wake up regularly to notice load failures while waiting
+                worker, generation = self._idle.get(timeout=min(remaining, self.check_interval))
+            except queue.Empty:
+                continue
+            with self._lock:
+                if worker.generation == generation and worker.state == "idle":
+                    if worker.is_alive():
+                        worker.state = "busy"
+                        return worker
+                    # Died while idle and the supervisor has not noticed yet
+                    worker.restart()
+
+    def _release(self, worker: _Worker, healthy: bool):
+        """Return a worker to the idle queue, or restart it; it rejoins once its model is loaded."""
+        with self._lock:
+            if healthy and worker.is_alive():
+                worker.state = "idle"
+                self._idle.put((worker, worker.generation))
+            else:
+                worker.restart()
+
+    def call(self, input_ids: np.ndarray, attention_mask: np.ndarray,
+             params: Optional[Dict[str, Any]] = None) -> Any:
+        """
+        Run one request on the next free worker.
+
+        Args:
+            input_ids: Token ids, shape (rows, tokens)
+            attention_mask: Attention mask with the same shape
+            params: Keyword arguments for the model (e.g. generation settings)
+
+        Returns:
+            Model output (logits for classification, token ids for summaries)
+        """
+        rows, cols = input_ids.shape
+        if rows > self.max_rows or cols > self.max_tokens:
+            raise ValueError(f"Input of shape {input_ids.shape} exceeds worker buffer ({self.max_rows}, {self.max_tokens})")
+
+        worker = self._acquire()
+        healthy = True
+        try:
+            arrays = _shared_arrays(worker.shm.buf, rows, cols)
+            arrays["input_ids"][:] = input_ids
+            arrays["attention_mask"][:] = attention_mask
+            del arrays
+
+            worker.conn.send((rows, cols, params or {}))
+            if not worker.conn.poll(self.timeout):
+                raise TimeoutError(f"No result within {self.timeout}s")
+            status, result = worker.conn.recv()
+        except (EOFError, OSError) as e:
+            # The worker crashed or hung; replace it so the next request gets a healthy one
+            logger.error(f"{worker.name} failed: {e!r}")
+            healthy = False
+            raise RuntimeError(f"{self.kind} worker failed: {e!r}")
+        finally:
+            self._release(worker, healthy)
+
+        if status == "error":
+            raise RuntimeError(result)
+        return result
+
+
+class RemoteZeroShotClassifier:
+    def __init__(self, pool: ModelWorkerPool, tokenizer, config,
+                 hypothesis_template: str = "This example is {}."):
+        """
+        Zero-shot classifier backed by a worker pool, called like the zero-shot-classification pipeline.
+
+        Args:
+            pool: Pool serving an NLI model
+            tokenizer: Tokenizer of that model
+            config: Config of that model (for the entailment label id)
+            hypothesis_template: Template turning a label into an NLI hypothesis
+        """
+        self.pool = pool
+        self.tokenizer = tokenizer
+        self.hypothesis_template = hypothesis_template
+        self.entailment_id = next(
+            (i for label, i in config.label2id.items() if label.lower().startswith("entail")), -1
+        )
+
+    @property
+    def available(self) -> bool:
+        return self.pool.available
+
+    def __call__(self, text: str, candidate_labels: List[str]) -> Dict[str, Any]:
+        logits = []
+        for start in range(0, len(candidate_labels), self.pool.max_rows):
+            labels = candidate_labels[start:start + self.pool.max_rows]
+            encoded = self.tokenizer(
+                [text] * len(labels),
+                [self.hypothesis_template.format(label) for label in labels],
+                truncation="only_first",
+                max_length=self.pool.max_tokens,
+                padding=True,
+                return_tensors="np"
+            )
+            logits.extend(self.pool.call(encoded["input_ids"], encoded["attention_mask"]))
+
+        # Softmax of the entailment logits across labels
+        entailment = np.array([row[self.entailment_id] for row in logits])
+        scores = np.exp(entailment - entailment.max())
+        scores /= scores.sum()
+
+        ranked = sorted(zip(candidate_labels, scores), key=lambda x: x[1], reverse=True)
+        return {
+            "sequence": text,
+            "labels": [label for label, _ in ranked],
+            "scores": [float(score) for _, score in ranked]
+        }
+
+
+class RemoteSummarizer:
+    def __init__(self, pool: ModelWorkerPool, tokenizer):
+        """
+        Summarizer backed by a worker pool, called like the summarization pipeline.
+
+        Args:
+            pool: Pool serving a sequence-to-sequence model
+            tokenizer: Tokenizer of that model
+        """
+        self.pool = pool
+        self.tokenizer = tokenizer
+
+    @property
+    def available(self) -> bool:
+        return self.pool.available
+
+    def __call__(self, text: str, max_length: int = 150, min_length: int = 30,
+                 do_sample: bool = False) -> List[Dict[str, str]]:
+        encoded = self.tokenizer([text], truncation=True, max_length=self.pool.max_tokens, return_tensors="np")
+        token_ids = self.pool.call(
+            encoded["input_ids"],
+            encoded["attention_mask"],
+            {"max_length": max_length, "min_length": min_length, "do_sample": do_sample}
+        )
+        return [{"summary_text": self.tokenizer.decode(token_ids, skip_special_tokens=True,
+                                                       clean_up_tokenization_spaces=True)}]
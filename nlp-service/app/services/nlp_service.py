@@ -1,7 +1,7 @@
 import os
 import spacy
 import numpy as np
-from typing import Dict, List, Optional, Any, Tuple
+from typing import Dict, List, Optional, Any, Tuple, Callable
 import nltk
 from nltk.sentiment.vader import SentimentIntensityAnalyzer
 from nltk.tokenize import word_tokenize, sent_tokenize
@@ -10,12 +10,23 @@ from nltk.util import ngrams
 from nltk.collocations import BigramCollocationFinder, TrigramCollocationFinder
 from nltk.metrics import BigramAssocMeasures, TrigramAssocMeasures
 from collections import Counter
-from transformers import pipeline, AutoModelForSequenceClassification, AutoTokenizer
+from transformers import pipeline, AutoModelForSequenceClassification, AutoTokenizer, AutoConfig
 import torch
 from geopy.geocoders import Nominatim
 import country_converter as coco
 import logging
 import re
+import time
+
+from app.services.trend_service import TrendAggregator
+from app.services.budget import StageTimings, LoadTracker, Deadline
+from app.services.source_store import SourceStore
+from app.services.model_workers import (
+    ModelWorkerPool, RemoteZeroShotClassifier, RemoteSummarizer, parse_cpus
+)
+from app.services.language_service import (
+    LanguageIdentifier, PipelineCache, LANGUAGE_PROFILES, DEFAULT_PROFILE, NGRAM_LANGUAGES, ALL_STAGES
+)
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
@@ -51,35 +62,69 @@ class NLPService:
             nltk.download('stopwords')
             self.stopwords = set(stopwords.words('english'))
         
-        # Credibility scoring factors
-        self.source_credibility = {
-            # Major news networks (example scores, should be based on actual analysis)
-            'bbc': 0.85,
-            'cnn': 0.75,
-            'reuters': 0.90,
-            'ap': 0.90,
-            'afp': 0.90,
-            'nytimes': 0.85,
-            'washingtonpost': 0.85,
-            'theguardian': 0.85,
-            'aljazeera': 0.75,
-            'foxnews': 0.65,
-            'cnbc': 0.80,
-            'bloomberg': 0.85,
-            # Default score for unknown sources
-            'default': 0.50
-        }
+        # Language identification and per-language pipelines (English stays resident)
+        self.language_identifier = LanguageIdentifier(self._stopword_lists())
+        self.pipelines = PipelineCache(self._load_pipeline, pinned={"en": self.nlp})
+        
+        # Source reputation, indexed by domain and publication name
+        self.sources = SourceStore()
+        
+        # Corpus-level trending words and phrases
+        self.trends = TrendAggregator()
+        
+        # Recent stage timings and load, used to fit analyses into latency budgets
+        self.stage_timings = StageTimings()
+        self.load = LoadTracker()
         
         logger.info("NLP service initialized successfully")
     
+    def _stopword_lists(self) -> Dict[str, List[str]]:
+        """Collect the NLTK stopword lists used as language identification profiles."""
+        lists = {}
+        for code, name in NGRAM_LANGUAGES.items():
+            try:
+                lists[code] = stopwords.words(name)
+            except Exception as e:
+                logger.warning(f"No NLTK stopwords for {name}, it will not be identified: {e}")
+        return lists
+    
+    def _load_pipeline(self, language: str):
+        """
+        Load the spaCy pipeline for a language.
+        
+        Falls back to a blank pipeline (tokenizer and stop words only) when the
+        language's model is not installed, and adds sentence splitting if the
+        pipeline has none.
+        """
+        model = LANGUAGE_PROFILES.get(language, DEFAULT_PROFILE)["model"]
+        nlp = None
+        if model:
+            try:
+                logger.info(f"Loading spaCy model {model} for '{language}'...")
+                nlp = spacy.load(model)
+            except Exception as e:
+                logger.warning(f"Could not load spaCy model {model}, using a blank pipeline: {e}")
+        if nlp is None:
+            try:
+                nlp = spacy.blank(language)
+            except Exception:
+                nlp = spacy.blank("xx")
+        if not any(pipe in nlp.pipe_names for pipe in ["parser", "senter", "sentencizer"]):
+            nlp.add_pipe("sentencizer")
+        return nlp
+    
     def load_transformer_models(self):
         """Load transformer models for various NLP tasks."""
+        self.model_pools = []
+        if os.getenv("MODEL_SERVING", "inprocess") == "workers":
+            self.load_model_workers()
+            return
+        
         # Text classification
         try:
             self.classifier = pipeline(
-                "text-classification", 
-                model="facebook/bart-large-mnli", 
-                return_all_scores=True
+                "zero-shot-classification", 
+                model="facebook/bart-large-mnli"
             )
         except Exception as e:
             logger.error(f"Error loading classifier model: {e}")
@@ -95,53 +140,184 @@ class NLPService:
             logger.error(f"Error loading summarizer model: {e}")
             self.summarizer = None
     
+    def load_model_workers(self):
+        """
+        Serve the transformer models from pools of worker processes.
+        
+        Each model gets its own pool, sized by CLASSIFIER_WORKERS / SUMMARIZER_WORKERS
+        and pinned to CLASSIFIER_CPUS / SUMMARIZER_CPUS (e.g. "0-3"). Only the
+        tokenizers are loaded in this process.
+        """
+        timeout = float(os.getenv("MODEL_WORKER_TIMEOUT", "300"))
+        
+        # Text classification
+        try:
+            model_name = "facebook/bart-large-mnli"
+            pool = ModelWorkerPool(
+                "classification", model_name,
+                workers=int(os.getenv("CLASSIFIER_WORKERS", "1")),
+                cpus=parse_cpus(os.getenv("CLASSIFIER_CPUS")),
+                timeout=timeout
+            )
+            self.classifier = RemoteZeroShotClassifier(
+                pool, AutoTokenizer.from_pretrained(model_name), AutoConfig.from_pretrained(model_name)
+            )
+            pool.start()
+            self.model_pools.append(pool)
+        except Exception as e:
+            logger.error(f"Error starting classifier workers: {e}")
+            self.classifier = None
+        
+        # Text summarization
+        try:
+            model_name = "facebook/bart-large-cnn"
+            pool = ModelWorkerPool(
+                "summary", model_name,
+                workers=int(os.getenv("SUMMARIZER_WORKERS", "1")),
+                cpus=parse_cpus(os.getenv("SUMMARIZER_CPUS")),
+                timeout=timeout
+            )
+            self.summarizer = RemoteSummarizer(pool, AutoTokenizer.from_pretrained(model_name))
+            pool.start()
+            self.model_pools.append(pool)
+        except Exception as e:
+            logger.error(f"Error starting summarizer workers: {e}")
+            self.summarizer = None
+    
+    def close(self):
+        """Stop any model worker processes."""
+        for pool in self.model_pools:
+            pool.stop()
+        self.model_pools = []
+    
     def analyze_text(self, text: str, title: Optional[str] = None, 
                     source: Optional[str] = None, url: Optional[str] = None,
-                    language: str = "en") -> Dict[str, Any]:
+                    language: str = "en", budget_ms: Optional[float] = None) -> Dict[str, Any]:
         """
         Perform comprehensive analysis on the provided text.
         
+        See analyze_with_errors for the arguments.
+        
+        Returns:
+            Dictionary containing analysis results
+        """
+        return self.analyze_with_errors(text, title, source, url, language, budget_ms)[0]
+    
+    def analyze_with_errors(self, text: str, title: Optional[str] = None,
+                            source: Optional[str] = None, url: Optional[str] = None,
+                            language: str = "en", budget_ms: Optional[float] = None,
+                            update_trends: bool = True) -> Tuple[Dict[str, Any], Dict[str, str]]:
+        """
+        Perform comprehensive analysis on the provided text, also reporting failed stages.
+        
         Args:
             text: The main text content to analyze
             title: Optional title of the article
             source: Optional source of the content (e.g., publication name)
             url: Optional URL where the content was found
             language: Language code (default: "en" for English)
+            budget_ms: Optional latency budget in milliseconds. Expensive stages
+                that are not expected to fit the remaining budget are replaced
+                by a cheaper variant or skipped.
+            update_trends: Add the article to the corpus-wide trends (off when
+                re-analyzing an article that was already counted)
             
         Returns:
-            Dictionary containing analysis results
+            Tuple of the analysis results and the error message of each stage
+            that failed and might succeed on another attempt
         """
         logger.info(f"Analyzing text from source: {source}")
         
-        # Combine title and text for better context if title is provided
-        full_text = f"{title}. {text}" if title else text
-        
-        # Get sentiment
-        sentiment = self.get_sentiment(full_text)
-        
-        # Extract entities
-        entities = self.extract_entities(full_text)
-        
-        # Classify text
-        classification = self.classify_text(full_text)
-        
-        # Extract geographic information
-        geo_info = self.extract_geographic_info(full_text)
-        
-        # Generate summary
-        summary = self.summarize_text(text)
-        
-        # Analyze bias
-        bias = self.analyze_bias(full_text, source)
-        
-        # Get top words and phrases
-        top_words = self.extract_top_words(text)
-        top_phrases = self.extract_top_phrases(text)
-        
-        # Assess credibility
-        credibility = self.assess_credibility(text, source, entities)
+        with self.load:
+            deadline = Deadline(budget_ms) if budget_ms else None
+            
+            # Combine title and text for better context if title is provided
+            full_text = f"{title}. {text}" if title else text
+            
+            # Identify the language and route to its pipeline; the requested language
+            # (or English) is used when the text cannot be identified confidently
+            detected, confidence = self.language_identifier.detect(full_text)
+            lang = detected or language or "en"
+            nlp = self.pipelines.get(lang)
+            stages = set(LANGUAGE_PROFILES.get(lang, DEFAULT_PROFILE)["stages"])
+            if "ner" not in nlp.pipe_names:
+                stages -= {"entities", "geographic_info"}
+            degraded = {
+                stage: "unsupported_language" for stage in ALL_STAGES
+                if stage not in stages and stage != "summary"
+            }
+            
+            # Cheap stages first
+            
+            # Get sentiment
+            sentiment = self.get_sentiment(full_text) if "sentiment" in stages else None
+            
+            # Extract entities
+            entities = self.extract_entities(full_text, nlp=nlp) if "entities" in stages else None
+            
+            # Analyze bias
+            bias = self.analyze_bias(full_text, source, url) if "bias_analysis" in stages else None
+            
+            # Get top words and phrases
+            word_counts = Counter()
+            top_words = None
+            if "topWords" in stages:
+                try:
+                    word_counts = self.count_words(text, nlp=nlp)
+                    top_words = dict(word_counts.most_common(15))
+                except Exception as e:
+                    logger.error(f"Error extracting top words: {e}")
+                    top_words = {"error": str(e)}
+            top_phrases = self.extract_top_phrases(text) if "topPhrases" in stages else None
+            
+            # Fold the article into the corpus-wide trends
+            if update_trends:
+                try:
+                    phrases = [] if not top_phrases or self._stage_error("topPhrases", top_phrases) else top_phrases
+                    self.trends.add_article(word_counts, phrases)
+                except Exception as e:
+                    logger.warning(f"Could not update trends: {e}")
+            
+            # Assess credibility
+            credibility = self.assess_credibility(text, source, entities, url) if "credibility" in stages else None
+            
+            # Expensive stages, each only if it is expected to fit the remaining budget
+            
+            # Classify text
+            classification = None
+            if "classification" in stages:
+                units = self._text_units(full_text)
+                if self._fits(deadline, "classification", units):
+                    classification = self._timed("classification", units, self.classify_text, full_text,
+                                                 ran=lambda result: "error" not in result)
+                else:
+                    classification = {}
+                    degraded["classification"] = "skipped"
+            
+            # Generate summary
+            units = self._text_units(text)
+            if "summary" in stages and self._fits(deadline, "summary", units):
+                summary, _ = self._timed("summary", units, self._summarize, text,
+                                         ran=lambda result: result[1])
+            else:
+                summary = self.summarize_text(text, extractive=True, nlp=nlp)
+                degraded["summary"] = "extractive"
+            
+            # Extract geographic information
+            geo_info = None
+            if "geographic_info" in stages:
+                units = len({ent["text"] for ent in entities if ent.get("type") in ["GPE", "LOC"]})
+                if self._fits(deadline, "geocoding", units):
+                    geo_info = self._timed("geocoding", units, self.extract_geographic_info, full_text, nlp=nlp,
+                                           ran=lambda result: "error" not in result)
+                else:
+                    geo_info = self.extract_geographic_info(full_text, geocode=False, nlp=nlp)
+                    degraded["geographic_info"] = "not_geocoded"
+            
+            if degraded:
+                logger.info(f"Degraded stages for language '{lang}' (budget {budget_ms}ms): {degraded}")
         
-        return {
+        result = {
             "sentiment": sentiment,
             "entities": entities,
             "classification": classification,
@@ -150,8 +326,64 @@ class NLPService:
             "bias_analysis": bias,
             "topWords": top_words,
             "topPhrases": top_phrases,
-            "credibility": credibility
+            "credibility": credibility,
+            "language": {"code": lang, "detected": detected is not None, "confidence": confidence}
         }
+        if deadline is not None or degraded:
+            result["degraded"] = degraded
+        
+        errors = {}
+        for stage in ALL_STAGES:
+            # Without a usable classifier every attempt fails the same way
+            if stage == "classification" and not self._model_available(self.classifier):
+                continue
+            error = self._stage_error(stage, result[stage])
+            if error is not None:
+                errors[stage] = error
+        return result, errors
+    
+    @staticmethod
+    def _model_available(model) -> bool:
+        """Whether a transformer model can serve requests (worker pools report load failures)."""
+        return model is not None and getattr(model, "available", True)
+    
+    @staticmethod
+    def _stage_error(stage: str, value: Any) -> Optional[str]:
+        """Return the error message a stage reported in place of its value, if any."""
+        if stage == "entities":
+            # extract_entities reports errors as a one-item list
+            value = value[0] if isinstance(value, list) and len(value) == 1 else None
+        elif stage == "credibility":
+            # assess_credibility keeps a neutral score and puts the error in its factors
+            value = value.get("factors") if isinstance(value, dict) else None
+        if isinstance(value, dict) and set(value) == {"error"} and isinstance(value["error"], str):
+            return value["error"]
+        return None
+    
+    def _text_units(self, text: str) -> float:
+        """Work units of a model stage: thousands of characters, capped at the models' input limit."""
+        return min(len(text), 5000) / 1000
+    
+    def _fits(self, deadline: Optional[Deadline], stage: str, units: float) -> bool:
+        """Return whether a stage is expected to finish before the deadline at the current load."""
+        if deadline is None:
+            return True
+        return deadline.fits(self.stage_timings.estimate(stage, units) * self.load.factor())
+    
+    def _timed(self, stage: str, units: float, func, *args,
+               ran: Optional[Callable[[Any], bool]] = None, **kwargs):
+        """
+        Run a stage and record its duration, normalized by current load.
+
+        ran tells from the stage's result whether the model actually did the
+        work; fallbacks and errors are not recorded, so they cannot drag the
+        stage's cost estimate down.
+        """
+        start = time.monotonic()
+        result = func(*args, **kwargs)
+        if ran is None or ran(result):
+            self.stage_timings.record(stage, (time.monotonic() - start) / self.load.factor(), units)
+        return result
     
     def get_sentiment(self, text: str) -> Dict[str, float]:
         """
@@ -176,18 +408,19 @@ class NLPService:
             logger.error(f"Error in sentiment analysis: {e}")
             return {"error": str(e)}
     
-    def extract_entities(self, text: str) -> List[Dict[str, Any]]:
+    def extract_entities(self, text: str, nlp=None) -> List[Dict[str, Any]]:
         """
         Extract named entities from text.
         
         Args:
             text: Text to analyze
+            nlp: spaCy pipeline to use (default: the English pipeline)
             
         Returns:
             List of extracted entities with type and context
         """
         try:
-            doc = self.nlp(text)
+            doc = (nlp or self.nlp)(text)
             entities = []
             
             for ent in doc.ents:
@@ -219,7 +452,7 @@ class NLPService:
             Dictionary of category scores
         """
         try:
-            if self.classifier is None:
+            if not self._model_available(self.classifier):
                 return {"error": "Classifier model not loaded"}
             
             # Define conflict-related categories for news articles
@@ -244,26 +477,28 @@ class NLPService:
             
             # Convert to simple dictionary format
             classification = {}
-            for result in results[0]:
-                classification[result['label']] = float(result['score'])
+            for label, score in zip(results['labels'], results['scores']):
+                classification[label] = float(score)
             
             return classification
         except Exception as e:
             logger.error(f"Error in text classification: {e}")
             return {"error": str(e)}
     
-    def extract_geographic_info(self, text: str) -> Dict[str, Any]:
+    def extract_geographic_info(self, text: str, geocode: bool = True, nlp=None) -> Dict[str, Any]:
         """
         Extract geographic information from text.
         
         Args:
             text: Text to analyze
+            geocode: Look up coordinates and countries with the remote geocoder
+            nlp: spaCy pipeline to use (default: the English pipeline)
             
         Returns:
             Dictionary with geographic information
         """
         try:
-            doc = self.nlp(text)
+            doc = (nlp or self.nlp)(text)
             locations = [ent.text for ent in doc.ents if ent.label_ in ["GPE", "LOC"]]
             
             geo_data = {
@@ -273,7 +508,7 @@ class NLPService:
             }
             
             # Try to geocode the locations
-            for loc in set(locations):
+            for loc in (set(locations) if geocode else []):
                 try:
                     location = self.geolocator.geocode(loc, timeout=5)
                     if location:
@@ -305,25 +540,33 @@ class NLPService:
             logger.error(f"Error in geographic info extraction: {e}")
             return {"error": str(e)}
     
-    def summarize_text(self, text: str, max_length: int = 150) -> str:
+    def summarize_text(self, text: str, max_length: int = 150, extractive: bool = False,
+                       nlp=None) -> str:
         """
         Generate a concise summary of the text.
         
         Args:
             text: Text to summarize
             max_length: Maximum length of the summary
+            extractive: Skip the transformer model and return the first sentence
+            nlp: spaCy pipeline used for sentence splitting (default: the English pipeline)
             
         Returns:
             Summarized text
         """
+        return self._summarize(text, max_length, extractive, nlp)[0]
+    
+    def _summarize(self, text: str, max_length: int = 150, extractive: bool = False,
+                   nlp=None) -> Tuple[str, bool]:
+        """Summarize text, also returning whether the transformer model produced the summary."""
         try:
-            if self.summarizer is None or len(text) < 100:
+            if extractive or not self._model_available(self.summarizer) or len(text) < 100:
                 # For short texts or if summarizer is not available, use a simple approach
-                doc = self.nlp(text)
+                doc = (nlp or self.nlp)(text)
                 sentences = list(doc.sents)
                 if sentences:
-                    return sentences[0].text  # Return first sentence as summary
-                return text[:max_length] + "..." if len(text) > max_length else text
+                    return sentences[0].text, False  # Return first sentence as summary
+                return (text[:max_length] + "..." if len(text) > max_length else text), False
             
             # Use transformer-based summarization for longer texts
             summary = self.summarizer(
@@ -332,18 +575,20 @@ class NLPService:
                 min_length=30, 
                 do_sample=False
             )
-            return summary[0]['summary_text']
+            return summary[0]['summary_text'], True
         except Exception as e:
             logger.error(f"Error in text summarization: {e}")
-            return text[:max_length] + "..." if len(text) > max_length else text
+            return (text[:max_length] + "..." if len(text) > max_length else text), False
     
-    def analyze_bias(self, text: str, source: Optional[str] = None) -> Dict[str, Any]:
+    def analyze_bias(self, text: str, source: Optional[str] = None,
+                     url: Optional[str] = None) -> Dict[str, Any]:
         """
         Analyze potential bias in the text.
         
         Args:
             text: Text to analyze
             source: Source of the content (optional)
+            url: URL of the content, used to identify the source (optional)
             
         Returns:
             Dictionary with bias analysis results
@@ -372,16 +617,19 @@ class NLPService:
                                          "certainly", "undoubtedly", "clearly"]
             ]
             
-            # Simple source bias rating (placeholder - would need a real database)
+            # Source bias rating from the source reputation store
             source_bias = {
                 "score": 0.5,  # Neutral by default
-                "confidence": 0.0  # Zero confidence if no source provided
+                "confidence": 0.0  # Zero confidence for unknown sources
             }
             
-            if source:
-                # Placeholder for source bias database lookup
-                # In a real implementation, this would check against a database of known sources
-                source_bias["confidence"] = 0.7  # Higher confidence if source is provided
+            match = self.sources.lookup(url, source)
+            if match:
+                outlet = match["outlet"]
+                # A known outlet without a bias rating is taken as neutral with the usual confidence
+                source_bias["outlet"] = outlet.get("name")
+                source_bias["score"] = outlet.get("bias", 0.5)
+                source_bias["confidence"] = outlet.get("bias_confidence", 0.7)
             
             # Calculate overall bias metrics
             emotionality = min(1.0, len(subjective_markers) / max(len(doc) * 0.1, 1))
@@ -415,6 +663,31 @@ class NLPService:
             logger.error(f"Error in bias analysis: {e}")
             return {"error": str(e)}
             
+    def count_words(self, text: str, nlp=None) -> Counter:
+        """
+        Count the relevant word lemmas in the text.
+        
+        Args:
+            text: Text to analyze
+            nlp: spaCy pipeline to use (default: the English pipeline)
+            
+        Returns:
+            Counter of lemmas, excluding stopwords, punctuation and numbers
+        """
+        # Tokenize and normalize text
+        doc = (nlp or self.nlp)(text.lower())
+        
+        # Extract tokens, filter out stopwords, punctuation, and numbers
+        # (pipelines without a lemmatizer leave lemma_ empty)
+        return Counter(
+            token.lemma_ or token.lower_ for token in doc 
+            if not token.is_stop 
+            and not token.is_punct 
+            and not token.is_digit
+            and len(token.text) > 2
+            and token.lemma_ not in self.stopwords
+        )
+            
     def extract_top_words(self, text: str, top_n: int = 15) -> Dict[str, int]:
         """
         Extract the most frequent words from the text.
@@ -427,24 +700,8 @@ class NLPService:
             Dictionary of top words and their frequencies
         """
         try:
-            # Tokenize and normalize text
-            doc = self.nlp(text.lower())
-            
-            # Extract tokens, filter out stopwords, punctuation, and numbers
-            words = [
-                token.lemma_ for token in doc 
-                if not token.is_stop 
-                and not token.is_punct 
-                and not token.is_digit
-                and len(token.text) > 2
-                and token.lemma_ not in self.stopwords
-            ]
-            
-            # Count frequencies
-            word_counts = Counter(words)
-            
             # Return top N words
-            return dict(word_counts.most_common(top_n))
+            return dict(self.count_words(text).most_common(top_n))
             
         except Exception as e:
             logger.error(f"Error extracting top words: {e}")
@@ -503,7 +760,8 @@ class NLPService:
             return {"error": str(e)}
     
     def assess_credibility(self, text: str, source: Optional[str] = None, 
-                          entities: Optional[List[Dict]] = None) -> Dict[str, Any]:
+                          entities: Optional[List[Dict]] = None,
+                          url: Optional[str] = None) -> Dict[str, Any]:
         """
         Assess the credibility of the news article.
         
@@ -511,6 +769,7 @@ class NLPService:
             text: Text to analyze
             source: Source of the article
             entities: Extracted entities (optional, to avoid recomputation)
+            url: URL of the article, used to identify the source (optional)
             
         Returns:
             Dictionary with credibility analysis results
@@ -519,16 +778,7 @@ class NLPService:
             credibility_factors = {}
             
             # 1. Source reputation (if available)
-            source_score = 0.5  # Default neutral score
-            if source:
-                # Normalize source name for lookup
-                normalized_source = re.sub(r'[^a-zA-Z]', '', source.lower())
-                for known_source in self.source_credibility:
-                    if known_source in normalized_source:
-                        source_score = self.source_credibility[known_source]
-                        break
-                if source_score == 0.5 and normalized_source:  # Still using default
-                    source_score = self.source_credibility['default']
+            source_score = self.sources.credibility(url, source)
             
             credibility_factors["source_reputation"] = source_score
             
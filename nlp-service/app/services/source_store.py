@@ -0,0 +1,150 @@
+import os
+import re
+import json
+import time
+import threading
+import logging
+from urllib.parse import urlsplit
+from typing import Dict, Optional, Any, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SOURCES_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "sources.json")
+
+
+def normalize_alias(name: str) -> str:
+    """Normalize a publication name for alias lookup (lowercase letters and digits only)."""
+    return re.sub(r'[^a-z0-9]', '', name.lower())
+
+
+def parse_host(url: str) -> Optional[str]:
+    """Return the lowercase host name of a URL, accepting URLs without a scheme."""
+    if "://" not in url:
+        url = "//" + url
+    try:
+        host = urlsplit(url.strip()).hostname
+    except ValueError:
+        return None
+    return host.rstrip(".") if host else None
+
+
+class SourceStore:
+    def __init__(self, path: Optional[str] = None, reload_interval: Optional[float] = None):
+        """
+        Initialize the source reputation store.
+
+        Outlets are read from a JSON file with one entry per outlet:
+        its domains, name aliases, credibility (0-1) and optionally
+        bias (0-1, default 0.5 = neutral) with a bias_confidence (default 0.7).
+
+        Args:
+            path: Path of the data file (env SOURCES_PATH)
+            reload_interval: Seconds between checks for a modified data file (env SOURCES_RELOAD_INTERVAL)
+        """
+        self.path = path or os.getenv("SOURCES_PATH", DEFAULT_SOURCES_PATH)
+        self.reload_interval = reload_interval if reload_interval is not None else float(
+            os.getenv("SOURCES_RELOAD_INTERVAL", "30"))
+        self.default_credibility = 0.5
+
+        self._domains: Dict[str, Dict[str, Any]] = {}
+        self._aliases: Dict[str, Dict[str, Any]] = {}
+        self._mtime = None
+        self._last_check = 0.0
+        self._lock = threading.Lock()
+        self.load()
+
+    def load(self):
+        """(Re)build the domain and alias indexes from the data file."""
+        mtime = os.path.getmtime(self.path)
+        with open(self.path, encoding="utf-8") as f:
+            data = json.load(f)
+
+        domains = {}
+        aliases = {}
+        for outlet in data.get("outlets", []):
+            for domain in outlet.get("domains", []):
+                domains[domain.lower().lstrip(".")] = outlet
+            for alias in [outlet.get("name", "")] + outlet.get("aliases", []):
+                if normalize_alias(alias):
+                    aliases[normalize_alias(alias)] = outlet
+
+        # Swap in the new indexes in one step so concurrent lookups never see a partial load
+        self._domains, self._aliases = domains, aliases
+        self.default_credibility = data.get("default_credibility", 0.5)
+        self._mtime = mtime
+        logger.info(f"Loaded {len(data.get('outlets', []))} outlets ({len(domains)} domains, "
+                    f"{len(aliases)} aliases) from {self.path}")
+
+    def _maybe_reload(self):
+        """Reload the data file if it changed, checking at most every reload_interval seconds."""
+        now = time.monotonic()
+        if now - self._last_check < self.reload_interval:
+            return
+        with self._lock:
+            if now - self._last_check < self.reload_interval:
+                return
+            self._last_check = now
+            try:
+                if os.path.getmtime(self.path) != self._mtime:
+                    self.load()
+            except Exception as e:
+                logger.warning(f"Could not reload sources from {self.path}: {e}")
+
+    def lookup_domain(self, host: str) -> Optional[Tuple[str, Dict[str, Any]]]:
+        """
+        Find the outlet owning a host name.
+
+        Tries the host and each parent domain in turn (news.bbc.co.uk,
+        bbc.co.uk, co.uk), so subdomains resolve with one hash lookup per label.
+
+        Returns:
+            Tuple of the matched domain and the outlet record, or None
+        """
+        labels = host.lower().split(".")
+        domains = self._domains
+        for i in range(len(labels) - 1):
+            domain = ".".join(labels[i:])
+            outlet = domains.get(domain)
+            if outlet is not None:
+                return domain, outlet
+        return None
+
+    def lookup(self, url: Optional[str] = None, source: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """
+        Find the outlet for an article by URL domain, falling back to its source name.
+
+        Args:
+            url: Article URL
+            source: Publication name or site name
+
+        Returns:
+            Dictionary with the outlet record and how it was matched, or None if unknown
+        """
+        self._maybe_reload()
+
+        if url:
+            host = parse_host(url)
+            match = self.lookup_domain(host) if host else None
+            if match:
+                return {"outlet": match[1], "matched_by": "domain", "key": match[0]}
+
+        if source:
+            alias = normalize_alias(source)
+            outlet = self._aliases.get(alias)
+            if outlet is not None:
+                return {"outlet": outlet, "matched_by": "alias", "key": alias}
+            # Site names are sometimes given as a bare domain
+            if "." in source:
+                host = parse_host(source)
+                match = self.lookup_domain(host) if host else None
+                if match:
+                    return {"outlet": match[1], "matched_by": "domain", "key": match[0]}
+
+        return None
+
+    def credibility(self, url: Optional[str] = None, source: Optional[str] = None) -> float:
+        """Return the credibility score of the article's outlet, or the default for unknown outlets."""
+        match = self.lookup(url, source)
+        if match is None:
+            return self.default_credibility
+        return match["outlet"].get("credibility", self.default_credibility)
@@ -0,0 +1,195 @@
+import os
+import time
+import threading
+import logging
+import numpy as np
+from typing import Dict, Iterable, Mapping, Optional
+
+logger = logging.getLogger(__name__)
+
+# Supported trend windows in seconds
+WINDOWS = {
+    "1h": 3600,
+    "6h": 6 * 3600,
+    "24h": 24 * 3600
+}
+
+
+class CountMinSketch:
+    def __init__(self, width: int = 2048, depth: int = 4):
+        """
+        Initialize a count-min sketch.
+
+        Args:
+            width: Counters per row (controls overestimation error)
+            depth: Number of hash rows (controls error probability)
+        """
+        self.width = width
+        self.depth = depth
+        self.table = np.zeros((depth, width), dtype=np.int32)
+        self._rows = np.arange(depth)
+
+    def _indexes(self, item: str) -> np.ndarray:
+        return np.array([hash((row, item)) % self.width for row in range(self.depth)])
+
+    def add(self, item: str, count: int = 1) -> int:
+        """Add count to item and return its new estimate."""
+        indexes = self._indexes(item)
+        self.table[self._rows, indexes] += count
+        return int(self.table[self._rows, indexes].min())
+
+    def estimate(self, item: str) -> int:
+        """Return the estimated count of item (never an underestimate)."""
+        return int(self.table[self._rows, self._indexes(item)].min())
+
+    def merge(self, other: "CountMinSketch"):
+        """Add the counts of a sketch with the same dimensions."""
+        self.table += other.table
+
+
+class HeavyHitterSketch:
+    def __init__(self, capacity: int, width: int = 2048, depth: int = 4):
+        """
+        Initialize a count-min sketch that also tracks its top items.
+
+        Args:
+            capacity: Maximum number of candidate heavy hitters kept
+            width: Sketch width
+            depth: Sketch depth
+        """
+        self.capacity = capacity
+        self.sketch = CountMinSketch(width, depth)
+        self.candidates: Dict[str, int] = {}
+        self._floor = 0
+
+    def add(self, item: str, count: int = 1):
+        estimate = self.sketch.add(item, count)
+        if item in self.candidates or len(self.candidates) < self.capacity:
+            self.candidates[item] = estimate
+        elif estimate > self._floor:
+            # Replace the weakest candidate, then refresh the admission floor
+            weakest = min(self.candidates, key=self.candidates.get)
+            if estimate > self.candidates[weakest]:
+                del self.candidates[weakest]
+                self.candidates[item] = estimate
+            self._floor = min(self.candidates.values())
+
+
+class SlidingWindowCounter:
+    def __init__(self, capacity: int, bucket_seconds: int, max_window: int,
+                 width: int = 2048, depth: int = 4):
+        """
+        Initialize a time-bucketed heavy-hitter counter.
+
+        Args:
+            capacity: Candidate heavy hitters kept per bucket
+            bucket_seconds: Length of each time bucket
+            max_window: Longest window that can be queried, in seconds
+            width: Sketch width
+            depth: Sketch depth
+        """
+        self.capacity = capacity
+        self.bucket_seconds = bucket_seconds
+        self.max_buckets = -(-max_window // bucket_seconds) + 1
+        self.width = width
+        self.depth = depth
+        self.buckets: Dict[int, HeavyHitterSketch] = {}
+
+    def _expire(self, current_id: int):
+        for bucket_id in [b for b in self.buckets if b <= current_id - self.max_buckets]:
+            del self.buckets[bucket_id]
+
+    def add(self, counts: Mapping[str, int], timestamp: float):
+        """Fold item counts into the bucket for timestamp."""
+        bucket_id = int(timestamp // self.bucket_seconds)
+        bucket = self.buckets.get(bucket_id)
+        if bucket is None:
+            bucket = self.buckets[bucket_id] = HeavyHitterSketch(self.capacity, self.width, self.depth)
+            self._expire(max(self.buckets))
+        for item, count in counts.items():
+            bucket.add(item, int(count))
+
+    def top(self, window: int, top_n: int, now: float) -> Dict[str, int]:
+        """
+        Return the top items over the last window seconds.
+
+        Args:
+            window: Window length in seconds
+            top_n: Number of items to return
+            now: Current timestamp
+
+        Returns:
+            Dictionary of items and their estimated counts
+        """
+        current_id = int(now // self.bucket_seconds)
+        self._expire(current_id)
+        first_id = current_id - (window // self.bucket_seconds) + 1
+        selected = [bucket for bucket_id, bucket in self.buckets.items() if first_id <= bucket_id <= current_id]
+        if not selected:
+            return {}
+
+        merged = CountMinSketch(self.width, self.depth)
+        candidates = set()
+        for bucket in selected:
+            merged.merge(bucket.sketch)
+            candidates.update(bucket.candidates)
+
+        estimates = {item: merged.estimate(item) for item in candidates}
+        return dict(sorted(estimates.items(), key=lambda x: x[1], reverse=True)[:top_n])
+
+
+class TrendAggregator:
+    def __init__(self, bucket_seconds: Optional[int] = None, capacity: Optional[int] = None):
+        """
+        Initialize corpus-level trending word and phrase aggregation.
+
+        Args:
+            bucket_seconds: Time bucket granularity (env TREND_BUCKET_SECONDS)
+            capacity: Candidates tracked per bucket (env TREND_CAPACITY)
+        """
+        bucket_seconds = bucket_seconds or int(os.getenv("TREND_BUCKET_SECONDS", "600"))
+        capacity = capacity or int(os.getenv("TREND_CAPACITY", "500"))
+        max_window = max(WINDOWS.values())
+        # Each window must span at least one whole bucket
+        if not 0 < bucket_seconds <= min(WINDOWS.values()):
+            raise ValueError(f"TREND_BUCKET_SECONDS must be between 1 and {min(WINDOWS.values())}, got {bucket_seconds}")
+
+        self.words = SlidingWindowCounter(capacity, bucket_seconds, max_window)
+        self.phrases = SlidingWindowCounter(capacity, bucket_seconds, max_window)
+        self._lock = threading.Lock()
+
+    def add_article(self, word_counts: Mapping[str, int], phrases: Iterable[str],
+                    timestamp: Optional[float] = None):
+        """
+        Fold one analyzed article into the trend sketches.
+
+        Args:
+            word_counts: Lemma frequencies in the article
+            phrases: Significant phrases (collocations) found in the article
+            timestamp: Time the article was analyzed (default: now)
+        """
+        timestamp = timestamp if timestamp is not None else time.time()
+        with self._lock:
+            self.words.add(word_counts, timestamp)
+            self.phrases.add({phrase: 1 for phrase in phrases}, timestamp)
+
+    def get_trends(self, window: str = "1h", top_n: int = 15) -> Dict[str, Dict[str, int]]:
+        """
+        Get trending words and phrases.
+
+        Args:
+            window: One of the keys of WINDOWS
+            top_n: Number of words and phrases to return
+
+        Returns:
+            Dictionary with topWords (lemma frequencies) and topPhrases
+            (number of articles featuring each phrase)
+        """
+        if window not in WINDOWS:
+            raise ValueError(f"Unknown window '{window}', expected one of: {', '.join(WINDOWS)}")
+        now = time.time()
+        with self._lock:
+            return {
+                "topWords": self.words.top(WINDOWS[window], top_n, now),
+                "topPhrases": self.phrases.top(WINDOWS[window], top_n, now)
+            }
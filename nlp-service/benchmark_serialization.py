@@ -0,0 +1,90 @@
+"""
+Compare /analyze response encoding paths on a synthetic entity-heavy result.
+
+Usage:
+    python benchmark_serialization.py [--entities 300] [--iterations 200]
+"""
+import argparse
+import json
+import time
+
+import orjson
+from pydantic import TypeAdapter
+
+from app.models.schemas import AnalysisResponse
+from app.models.results import AnalysisResult
+from app.responses import MsgPackResponse
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+
+def build_result(num_entities: int) -> dict:
+    """Build an analysis result shaped like NLPService.analyze_text output."""
+    sentence = "The minister said on Tuesday that talks with the delegation in Geneva would resume next week."
+    return {
+        "sentiment": {"positive": 0.12, "negative": 0.08, "neutral": 0.8, "compound": 0.34},
+        "entities": [
+            {"text": f"Entity {i}", "type": "GPE", "start_char": i * 10, "end_char": i * 10 + 8, "context": sentence}
+            for i in range(num_entities)
+        ],
+        "classification": {f"label {i}": 1.0 / (i + 1) for i in range(13)},
+        "geographic_info": {
+            "mentioned_locations": [f"Place {i}" for i in range(num_entities // 3)],
+            "coordinates": {f"Place {i}": {"latitude": 46.2, "longitude": 6.1} for i in range(20)},
+            "countries": ["Switzerland", "France"],
+            "country_codes": {"Switzerland": "CH", "France": "FR"}
+        },
+        "summary": sentence * 3,
+        "bias_analysis": {
+            "bias_score": 0.31,
+            "emotional_language": {"score": 0.2, "markers": ["strong"] * 10},
+            "uncertainty": {"score": 0.1, "markers": ["could", "might"]},
+            "extreme_language": {"score": 0.05, "markers": ["never"]},
+            "source_bias": {"score": 0.5, "confidence": 0.7}
+        },
+        "topWords": {f"word{i}": 15 - i for i in range(15)},
+        "topPhrases": {f"phrase {i}": 500 - i for i in range(10)},
+        "credibility": {"score": 0.72, "factors": {"source_reputation": 0.9, "attribution": 0.6}}
+    }
+
+
+def timeit(fn, iterations: int) -> float:
+    """Return mean milliseconds per call."""
+    fn()
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - start) * 1000 / iterations
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--entities", type=int, default=300)
+    parser.add_argument("--iterations", type=int, default=200)
+    args = parser.parse_args()
+
+    result = build_result(args.entities)
+    adapter = TypeAdapter(AnalysisResponse)
+
+    def pydantic_path():
+        # What FastAPI does for response_model: validate, dump in JSON mode, then json.dumps
+        value = adapter.validate_python(result)
+        return json.dumps(adapter.dump_python(value, mode="json")).encode("utf-8")
+
+    def orjson_path():
+        return orjson.dumps(AnalysisResult(**result), default=str, option=orjson.OPT_SERIALIZE_NUMPY)
+
+    paths = [("pydantic + json", pydantic_path), ("orjson", orjson_path)]
+    if msgpack is not None:
+        paths.append(("msgpack", lambda: MsgPackResponse(AnalysisResult(**result)).body))
+
+    print(f"{args.entities} entities, {args.iterations} iterations")
+    for name, fn in paths:
+        print(f"{name:>16}: {timeit(fn, args.iterations):8.3f} ms  {len(fn()):>8} bytes")
+
+
+if __name__ == "__main__":
+    main()